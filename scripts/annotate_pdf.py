@@ -11,6 +11,7 @@ import json
 import sys
 import os
 import re
+import unicodedata
 
 # 高亮颜色配置
 COLORS = {
@@ -48,17 +49,131 @@ ACADEMIC_TERMS = {
 }
 
 
-def highlight_text(page, text_to_highlight, ann_type):
-    """在 PDF 页面中高亮指定文本"""
+# 高亮出现次数策略：all（全部）/ first（仅首个）/ nearest（最接近 context）/ 整数 N（最多 N 处）
+DEFAULT_OCCURRENCE = "all"
+
+
+def _normalize_match_text(text):
+    """展开连字（ﬁ -> fi）并去掉空白与连字符，用于比较命中覆盖的字符数"""
+    return re.sub(r"[\s\-\u00ad]", "", unicodedata.normalize("NFKC", text or ""))
+
+
+def _count_quad_chars(page, rect):
+    """
+    统计中心落在 rect 垂直中带内的字符数
+    search_for 的 quad 比行距高，行距较紧时会压到上下相邻行，
+    get_textbox(rect) 会把相邻行的文字也算进来，这里只取本行字符
+    """
+    band_y0 = rect.y0 + rect.height / 4
+    band_y1 = rect.y1 - rect.height / 4
+    chars = []
+    
+    raw = page.get_text("rawdict", clip=rect)
+    for block in raw.get("blocks", []):
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                for char in span.get("chars", []):
+                    x0, y0, x1, y1 = char["bbox"]
+                    cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+                    if rect.x0 <= cx <= rect.x1 and band_y0 <= cy <= band_y1:
+                        chars.append(char["c"])
+    
+    return len(_normalize_match_text("".join(chars)))
+
+
+def _continues_match(prev, rect):
+    """
+    判断 rect 是否可能是 prev 所在匹配的续行
+    - 换行：rect 顶部低于 prev 的垂直中线（行高通常大于行距，不能用 prev.y1 比较）
+    - 换栏：rect 位于 prev 右侧且整体在 prev 上方（下一栏顶部）
+    """
+    if rect.y0 >= (prev.y0 + prev.y1) / 2:
+        return True
+    return rect.x0 >= prev.x1 and rect.y1 <= prev.y0 + 1
+
+
+def group_search_hits(page, text_to_highlight, quads):
+    """
+    将 search_for 的逐行命中合并为逻辑匹配
+    跨行的一句话会被拆成多个 quad，这里按覆盖字符数把它们重新归为一组
+    返回: [[quad, ...], ...]
+    """
+    if not re.search(r"\s", text_to_highlight.strip()):
+        # 不含空白的短语不会跨行，每个命中即一个匹配
+        return [[quad] for quad in quads]
+    
+    target = len(_normalize_match_text(text_to_highlight))
+    groups = []
+    current = []
+    covered = 0
+    
+    for quad in quads:
+        rect = quad.rect
+        # 同一行或左上方的命中必然是新的匹配
+        if current and not _continues_match(current[-1].rect, rect):
+            groups.append(current)
+            current, covered = [], 0
+        
+        current.append(quad)
+        covered += _count_quad_chars(page, rect)
+        if covered >= target:
+            groups.append(current)
+            current, covered = [], 0
+    
+    if current:
+        groups.append(current)
+    return groups
+
+
+def select_occurrences(page, groups, occurrence=DEFAULT_OCCURRENCE, context=None):
+    """按出现次数策略筛选逻辑匹配"""
+    if not groups or occurrence in (None, "all"):
+        return groups
+    
+    if occurrence == "first":
+        return groups[:1]
+    
+    if occurrence == "nearest":
+        anchors = page.search_for(context) if context else []
+        if not anchors:
+            return groups[:1]
+        anchor = anchors[0]
+        ax, ay = (anchor.x0 + anchor.x1) / 2, (anchor.y0 + anchor.y1) / 2
+        
+        def distance(group):
+            rect = group[0].rect
+            return ((rect.x0 + rect.x1) / 2 - ax) ** 2 + ((rect.y0 + rect.y1) / 2 - ay) ** 2
+        
+        return [min(groups, key=distance)]
+    
+    try:
+        limit = int(occurrence)
+    except (TypeError, ValueError):
+        print(f"[paper-lens] 未知的 occurrence 策略: {occurrence}，按 all 处理", file=sys.stderr)
+        return groups
+    return groups[:max(limit, 0)]
+
+
+def highlight_text(page, text_to_highlight, ann_type, occurrence=DEFAULT_OCCURRENCE, context=None):
+    """
+    在 PDF 页面中高亮指定文本
+    每个逻辑匹配（含跨行）只生成一个多 quad 高亮注释
+    返回: (创建的注释数, 相比逐 rect 高亮避免的注释数)
+    """
     color = COLORS.get(ann_type, COLORS["background"])
-    text_instances = page.search_for(text_to_highlight)
+    quads = page.search_for(text_to_highlight, quads=True)
+    if not quads:
+        return 0, 0
+    
+    groups = group_search_hits(page, text_to_highlight, quads)
+    selected = select_occurrences(page, groups, occurrence, context)
     
-    for inst in text_instances:
-        highlight = page.add_highlight_annot(inst)
+    for group in selected:
+        highlight = page.add_highlight_annot(quads=group)
         highlight.set_colors(stroke=color)
         highlight.update()
     
-    return len(text_instances)
+    return len(selected), len(quads) - len(selected)
 
 
 def add_term_annotation(page, term, definition, rect):
@@ -109,7 +224,8 @@ def generate_term_annotations(doc, enable_terms=True):
     return annotation_count
 
 
-def annotate_pdf(input_path, annotations_json, output_path, enable_terms=True, cleanup_json=True):
+def annotate_pdf(input_path, annotations_json, output_path, enable_terms=True, cleanup_json=True,
+                 default_occurrence=DEFAULT_OCCURRENCE):
     """
     标注 PDF
     
@@ -118,6 +234,7 @@ def annotate_pdf(input_path, annotations_json, output_path, enable_terms=True, c
         annotations_json: 标注 JSON 文件路径或 JSON 字符串
         output_path: 输出 PDF 路径
         enable_terms: 是否启用术语注释（默认开启）
+        default_occurrence: 标注未指定 occurrence 时使用的出现次数策略
     """
     try:
         doc = fitz.open(input_path)
@@ -134,6 +251,7 @@ def annotate_pdf(input_path, annotations_json, output_path, enable_terms=True, c
         
         # 处理高亮标注
         highlight_count = 0
+        avoided_count = 0
         for ann in annotations:
             page_num = ann.get("page", 1) - 1
             if page_num < 0 or page_num >= len(doc):
@@ -144,8 +262,13 @@ def annotate_pdf(input_path, annotations_json, output_path, enable_terms=True, c
             text_to_highlight = ann.get("text", "")
             
             if text_to_highlight and ann_type != "text_note":
-                count = highlight_text(page, text_to_highlight, ann_type)
+                count, avoided = highlight_text(
+                    page, text_to_highlight, ann_type,
+                    occurrence=ann.get("occurrence", default_occurrence),
+                    context=ann.get("context")
+                )
                 highlight_count += count
+                avoided_count += avoided
         
         # 生成术语注释
         term_count = 0
@@ -164,6 +287,8 @@ def annotate_pdf(input_path, annotations_json, output_path, enable_terms=True, c
                 pass
         
         print(f"[paper-lens] 高亮标注: {highlight_count} 处", file=sys.stderr)
+        if avoided_count:
+            print(f"[paper-lens] 合并/限制后少生成注释对象: {avoided_count} 个", file=sys.stderr)
         if enable_terms:
             print(f"[paper-lens] 术语注释: {term_count} 个", file=sys.stderr)
         
@@ -178,9 +303,10 @@ def annotate_pdf(input_path, annotations_json, output_path, enable_terms=True, c
 
 if __name__ == "__main__":
     if len(sys.argv) < 4:
-        print("Usage: python annotate_pdf.py <input.pdf> <annotations.json> <output.pdf> [--no-terms] [--keep-json]")
+        print("Usage: python annotate_pdf.py <input.pdf> <annotations.json> <output.pdf> [--no-terms] [--keep-json] [--occurrence=all|first|nearest|N]")
         print("  --no-terms: 关闭术语注释")
         print("  --keep-json: 保留 annotations.json")
+        print("  --occurrence: 标注未指定 occurrence 时的默认出现次数策略（默认 all）")
         sys.exit(1)
     
     input_pdf = sys.argv[1]
@@ -188,8 +314,13 @@ if __name__ == "__main__":
     output_pdf = sys.argv[3]
     enable_terms = '--no-terms' not in sys.argv
     cleanup_json = '--keep-json' not in sys.argv
+    occurrence = DEFAULT_OCCURRENCE
+    for arg in sys.argv[4:]:
+        if arg.startswith('--occurrence='):
+            occurrence = arg.split('=', 1)[1]
     
-    if annotate_pdf(input_pdf, ann_json, output_pdf, enable_terms=enable_terms, cleanup_json=cleanup_json):
+    if annotate_pdf(input_pdf, ann_json, output_pdf, enable_terms=enable_terms, cleanup_json=cleanup_json,
+                    default_occurrence=occurrence):
         print(f"Success: {output_pdf}")
     else:
         sys.exit(1)
@@ -14,7 +14,7 @@ import fitz  # PyMuPDF for metadata
 from pathlib import Path
 
 # 导入图表提取模块
-from extract_figures import extract_figures, PURPOSE_STRATEGIES
+from extract_figures import extract_figures, extract_figures_all_purposes, describe_figures, PURPOSE_STRATEGIES
 
 
 def resolve_output_dir(pdf_path):
@@ -107,7 +107,8 @@ def cleanup_temp_files(output_dir, *files):
             pass
 
 
-def extract_content(pdf_path, purpose="deep_dive", pages=None, include_figures=True, output_dir=None):
+def extract_content(pdf_path, purpose="deep_dive", pages=None, include_figures=True, output_dir=None,
+                    lazy_figures=False):
     """
     统一内容提取入口
     
@@ -117,6 +118,8 @@ def extract_content(pdf_path, purpose="deep_dive", pages=None, include_figures=T
         pages: 指定页码范围
         include_figures: 是否提取图表
         output_dir: 输出目录 (默认 PDF 同目录同名文件夹)
+        lazy_figures: 只返回图表描述符，不导出图像（之后用 materialize_descriptors 按需导出，
+                      描述符的 extractable 为 None 时需导出后才能确定）
     
     Returns:
         dict: {text, figures, metadata, output_dir}
@@ -157,34 +160,104 @@ def extract_content(pdf_path, purpose="deep_dive", pages=None, include_figures=T
         result["text"] = extract_text_fitz(pdf_path, start_page, end_page)
     
     # 提取图表
-    if include_figures:
+    if include_figures and lazy_figures:
+        result["figures"] = describe_figures(pdf_path, purpose)
+    elif include_figures:
         result["figures"] = extract_figures(pdf_path, purpose, figures_dir)
     
     return result
 
 
+def extract_content_all_purposes(pdf_path, include_figures=True, output_dir=None):
+    """
+    单次解析，同时计算所有阅读目的的页面范围与图表选择
+    
+    Args:
+        pdf_path: PDF 文件路径
+        include_figures: 是否提取图表
+        output_dir: 输出目录 (默认 PDF 同目录同名文件夹)
+    
+    Returns:
+        dict: {text, figures, purposes: {purpose: {pages, figures}}, metadata, output_dir}
+        text 覆盖所有目的页面的并集；figures 为去重后的图表全集
+    """
+    if output_dir is None:
+        output_dir = resolve_output_dir(pdf_path)
+    
+    figures_dir = os.path.join(output_dir, "figures")
+    
+    result = {
+        "text": [],
+        "figures": [],
+        "purposes": {},
+        "metadata": {},
+        "output_dir": output_dir
+    }
+    
+    result["metadata"] = extract_metadata(pdf_path)
+    total_pages = result["metadata"].get("total_pages", 0)
+    
+    all_pages = set()
+    for purpose in PURPOSE_STRATEGIES:
+        page_list = get_pages_for_purpose(purpose, total_pages)
+        result["purposes"][purpose] = {"pages": page_list, "figures": []}
+        all_pages.update(page_list)
+    
+    if all_pages:
+        result["text"] = extract_text_fitz(pdf_path, min(all_pages), max(all_pages))
+    
+    if include_figures:
+        # 复用已提取的页面文本，整个流程每页只 get_text() 一次
+        page_texts = {page["page"]: page["text"] for page in result["text"]}
+        figures = extract_figures_all_purposes(pdf_path, figures_dir, page_texts=page_texts)
+        result["figures"] = figures["figures"]
+        for purpose, selection in figures["purposes"].items():
+            result["purposes"][purpose]["figures"] = selection
+    
+    return result
+
+
 if __name__ == "__main__":
     import argparse
     
     parser = argparse.ArgumentParser(description="Extract content from PDF")
     parser.add_argument("pdf_path", help="Path to PDF file")
-    parser.add_argument("--purpose", "-p", default="deep_dive",
+    parser.add_argument("--purpose", "-p", default=None,
                         choices=["quick_scan", "deep_dive", "method_focus", "review_prep", "brainstorm", "beginner"],
-                        help="Reading purpose")
+                        help="Reading purpose (default: deep_dive)")
     parser.add_argument("--pages", help="Page range (e.g., 1-5)")
     parser.add_argument("--no-figures", action="store_true", help="Skip figure extraction")
+    parser.add_argument("--lazy-figures", action="store_true",
+                        help="Return figure descriptors only; materialize images later")
+    parser.add_argument("--all-purposes", action="store_true",
+                        help="Compute pages and figures for every purpose in one pass")
     parser.add_argument("--output-dir", "-o", help="Output directory")
     parser.add_argument("--output-file", "-f", help="Save result to JSON file (debug only)")
     
     args = parser.parse_args()
     
-    content = extract_content(
-        args.pdf_path,
-        purpose=args.purpose,
-        pages=args.pages,
-        include_figures=not args.no_figures,
-        output_dir=args.output_dir
-    )
+    if args.all_purposes and args.lazy_figures:
+        parser.error("--lazy-figures cannot be combined with --all-purposes")
+    if args.all_purposes and args.purpose is not None:
+        parser.error("--purpose cannot be combined with --all-purposes")
+    if args.all_purposes and args.pages is not None:
+        parser.error("--pages cannot be combined with --all-purposes")
+    
+    if args.all_purposes:
+        content = extract_content_all_purposes(
+            args.pdf_path,
+            include_figures=not args.no_figures,
+            output_dir=args.output_dir
+        )
+    else:
+        content = extract_content(
+            args.pdf_path,
+            purpose=args.purpose or "deep_dive",
+            pages=args.pages,
+            include_figures=not args.no_figures,
+            output_dir=args.output_dir,
+            lazy_figures=args.lazy_figures
+        )
     
     # Print-safe JSON (avoid Windows console encoding issues)
     output_json = json.dumps(content, ensure_ascii=True, indent=2)
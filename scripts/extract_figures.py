@@ -31,6 +31,43 @@ FIGURE_PATTERNS = [
     r"(表)\s*(\d+)[.:]?\s*(.{0,100}?)(?:\n|$)",
 ]
 
+# 图像解码上限：超过该像素数的嵌入图像不解码（防止超大扫描图拖死进程）
+MAX_IMAGE_PIXELS = 50_000_000
+# 每页最多检查的嵌入图像数（防止单页上千张小图）
+MAX_IMAGES_PER_PAGE = 200
+# 解码后小于该字节数的图像视为装饰/图标，不作为图表导出
+MIN_IMAGE_BYTES = 1000
+
+# 正文图表引用识别（支持 "Figs. 2–4"、"Tables 1 and 2"、"图2"、"表 3-5" 等）
+CITATION_PATTERN = re.compile(
+    r"\b(Figures?|Figs?\.?|Tables?|Tabs?\.)\s*"
+    r"(\d{1,3}(?!\d)(?:\s*(?:,\s*(?:and|&)|[-–—,&]|and|to)\s*\d{1,3}(?!\d))*)"
+    r"|(图|表)\s*(\d{1,3}(?!\d)(?:\s*[-–—~～至、,，和与]\s*\d{1,3}(?!\d))*)",
+    re.IGNORECASE
+)
+CITATION_RANGE_SEPARATORS = {"-", "–", "—", "~", "～", "至", "to"}
+# 列表末尾数字后紧跟数量名词/量词时视为普通数量，如 "Table 3, 40 subjects"、"图2和3个模型"
+# 只认这些明确的数量词，"Fig. 3, 4, and 5 show" 之类后接动词的列表照常计数
+CITATION_QUANTITY_NOUNS = [
+    "subjects?", "participants?", "patients?", "respondents?", "users?", "students?", "people",
+    "persons?", "individuals?", "samples?", "runs?", "trials?", "items?", "cases?", "times",
+    "epochs?", "iterations?", "steps?", "layers?", "seconds?", "minutes?", "hours?", "days?",
+    "weeks?", "months?", "years?", "percent", "images?", "datasets?", "studies", "papers?",
+]
+CITATION_TRAILING_QUANTITY = re.compile(
+    r"\s*(?:%|(?:" + "|".join(CITATION_QUANTITY_NOUNS) + r")\b|[个名位次组项例份篇种条])",
+    re.IGNORECASE
+)
+CITATION_LAST_ITEM = re.compile(r"\s*(?:,\s*(?:and|&)|[-–—~～至、,，&和与]|and|to)\s*\d+$", re.IGNORECASE)
+# 单个范围最多展开的编号数，防止误匹配导致的大范围展开
+MAX_CITATION_RANGE = 50
+
+# MuPDF 分配失败时的错误信息关键词（RLIMIT_AS 下不会抛 MemoryError）
+ALLOCATION_ERROR_KEYWORDS = ["malloc", "out of memory", "cannot allocate", "can't start new thread"]
+# 为 True 时，单张图像的内存分配失败会向上抛出而非跳过该图像
+# 仅由 sandbox.py 的子进程开启，以便整篇文档报告 memory_exceeded；普通调用仍只跳过该图像
+RAISE_ON_ALLOCATION_FAILURE = False
+
 # 区域关键词
 REGION_KEYWORDS = {
     "abstract": ["abstract", "摘要", "summary"],
@@ -40,6 +77,14 @@ REGION_KEYWORDS = {
 }
 
 
+def is_allocation_failure(exc):
+    """判断异常是否为内存分配失败（Python MemoryError 或 MuPDF/线程创建的分配错误）"""
+    if isinstance(exc, MemoryError):
+        return True
+    message = str(exc).lower()
+    return any(keyword in message for keyword in ALLOCATION_ERROR_KEYWORDS)
+
+
 def detect_page_region(page_text):
     """检测页面所属区域"""
     text_lower = page_text.lower()
@@ -110,21 +155,90 @@ def detect_figures_in_page(page_text, page_num):
     return figures
 
 
-def calculate_figure_importance(figure_info, page_text, purpose):
-    """计算图表重要性评分"""
+def parse_citation_numbers(number_text):
+    """
+    解析引用中的编号序列，如 "2–4, 6" -> [2, 3, 4, 6]
+    降序范围（章节式编号 "Figure 5-2"）不是图表编号列表，返回 []
+    """
+    numbers = []
+    pending_range = False
+    
+    for token in re.findall(r"\d+|to|[-–—~～至]", number_text, re.IGNORECASE):
+        if token.isdigit():
+            num = int(token)
+            if pending_range and numbers and num <= numbers[-1]:
+                return []
+            if pending_range and numbers and num - numbers[-1] <= MAX_CITATION_RANGE:
+                numbers.extend(range(numbers[-1] + 1, num + 1))
+            else:
+                numbers.append(num)
+            pending_range = False
+        elif token.lower() in CITATION_RANGE_SEPARATORS:
+            pending_range = True
+    
+    return numbers
+
+
+def build_citation_index(page_texts, figures=None):
+    """
+    单次线性扫描全文，建立图表引用索引
+    
+    Args:
+        page_texts: {页码: 文本}
+        figures: collect_figures() 找到的图表；给出时忽略超过该类型最大编号的引用
+    
+    Returns:
+        dict: {
+            refs: {(type, number): {count, pages}},  # 全文引用次数与出现页码（含图注本身）
+            regions: {页码: 区域}
+        }
+    """
+    refs = {}
+    regions = {}
+    max_numbers = {}
+    for fig in figures or []:
+        max_numbers[fig["type"]] = max(max_numbers.get(fig["type"], 0), int(fig["number"]))
+    
+    for page_num in sorted(page_texts):
+        page_text = page_texts[page_num]
+        regions[page_num] = detect_page_region(page_text)
+        
+        for match in CITATION_PATTERN.finditer(page_text):
+            label = (match.group(1) or match.group(3)).lower()
+            number_text = match.group(2) or match.group(4)
+            fig_type = "table" if label.startswith("tab") or label == "表" else "figure"
+            
+            # 列表末尾紧跟数量词："Table 3, 40 subjects" 中的 40 不是表号
+            if (CITATION_LAST_ITEM.search(number_text)
+                    and CITATION_TRAILING_QUANTITY.match(page_text, match.end())):
+                number_text = CITATION_LAST_ITEM.sub("", number_text)
+            
+            for num in parse_citation_numbers(number_text):
+                if fig_type in max_numbers and num > max_numbers[fig_type]:
+                    continue
+                entry = refs.setdefault((fig_type, str(num)), {"count": 0, "pages": []})
+                entry["count"] += 1
+                if not entry["pages"] or entry["pages"][-1] != page_num:
+                    entry["pages"].append(page_num)
+    
+    return {"refs": refs, "regions": regions}
+
+
+def calculate_figure_importance(figure_info, citation_index, purpose):
+    """计算图表重要性评分（只查引用索引，不再扫描页面文本）"""
     score = 0
     strategy = PURPOSE_STRATEGIES.get(purpose, PURPOSE_STRATEGIES["deep_dive"])
     priority_regions = strategy["priority"]
     
-    page_region = detect_page_region(page_text)
+    page_region = citation_index["regions"].get(figure_info["page"], "body")
     if "all" in priority_regions or page_region in priority_regions:
         score += 10
     
     if figure_info["page"] <= 2:
         score += 5
     
-    fig_ref_pattern = rf"(?:Figure|Fig\.?|图)\s*{figure_info['number']}"
-    ref_count = len(re.findall(fig_ref_pattern, page_text, re.IGNORECASE))
+    refs = citation_index["refs"].get((figure_info["type"], str(figure_info["number"])))
+    ref_count = refs["count"] if refs else 0
     score += ref_count * 2
     
     if purpose == "method_focus" and figure_info["type"] == "table":
@@ -133,11 +247,17 @@ def calculate_figure_importance(figure_info, page_text, purpose):
     return score
 
 
-def extract_embedded_images(pdf_path, page_num, output_dir, fig_info):
+def extract_embedded_images(pdf_path, page_num, output_dir, fig_info, max_pixels=None, max_images=None):
     """
     使用 PyMuPDF 提取页面中的嵌入图像
+    超过 max_pixels 的图像直接跳过，每页最多检查 max_images 张
     返回: (image_path, success) 或 (None, False)
     """
+    if max_pixels is None:
+        max_pixels = MAX_IMAGE_PIXELS
+    if max_images is None:
+        max_images = MAX_IMAGES_PER_PAGE
+    
     try:
         doc = fitz.open(pdf_path)
         page = doc[page_num - 1]
@@ -154,8 +274,12 @@ def extract_embedded_images(pdf_path, page_num, output_dir, fig_info):
         best_image = None
         best_size = 0
         
-        for img_index, img_info in enumerate(image_list):
+        for img_index, img_info in enumerate(image_list[:max_images]):
             xref = img_info[0]
+            width, height = img_info[2], img_info[3]
+            if width * height > max_pixels:
+                print(f"[paper-lens] 跳过第{page_num}页超大图像 ({width}x{height})", file=sys.stderr)
+                continue
             try:
                 base_image = doc.extract_image(xref)
                 if base_image:
@@ -164,10 +288,12 @@ def extract_embedded_images(pdf_path, page_num, output_dir, fig_info):
                     if size > best_size:
                         best_size = size
                         best_image = base_image
-            except:
+            except Exception as e:
+                if RAISE_ON_ALLOCATION_FAILURE and is_allocation_failure(e):
+                    raise
                 continue
         
-        if best_image and best_size > 1000:  # 至少 1KB
+        if best_image and best_size > MIN_IMAGE_BYTES:
             ext = best_image.get("ext", "png")
             filename = f"{fig_info['type']}_{fig_info['number']}.{ext}"
             image_path = os.path.join(output_dir, filename)
@@ -182,10 +308,83 @@ def extract_embedded_images(pdf_path, page_num, output_dir, fig_info):
         return None, False
         
     except Exception as e:
+        if RAISE_ON_ALLOCATION_FAILURE and is_allocation_failure(e):
+            raise
         print(f"Error extracting image from page {page_num}: {e}", file=sys.stderr)
         return None, False
 
 
+def collect_figures(doc, page_texts=None):
+    """
+    单次遍历文档，收集每页文本与去重后的图表候选
+    page_texts: 已提取的 {页码: 文本}，命中的页面不再重复 get_text()
+    返回: (page_texts, unique_figures)
+    """
+    page_texts = dict(page_texts or {})
+    unique_figures = []
+    seen = set()
+    
+    for i in range(len(doc)):
+        if i + 1 not in page_texts:
+            page_texts[i + 1] = doc[i].get_text()
+        page_text = page_texts[i + 1]
+        
+        for fig in detect_figures_in_page(page_text, i + 1):
+            key = (fig["type"], fig["number"])
+            if key not in seen:
+                seen.add(key)
+                unique_figures.append(fig)
+    
+    return page_texts, unique_figures
+
+
+def rank_figures(figures, citation_index, purpose, max_figures):
+    """按阅读目的计算重要性并选取 top N（不修改传入的图表信息）"""
+    scored = []
+    for fig in figures:
+        ranked = dict(fig)
+        ranked["importance"] = calculate_figure_importance(fig, citation_index, purpose)
+        scored.append(ranked)
+    
+    scored.sort(key=lambda x: x["importance"], reverse=True)
+    return scored[:max_figures]
+
+
+def materialize_figure(pdf_path, fig, output_dir):
+    """
+    导出单个图表图像
+    返回: {page, type, number, path, caption, extractable[, message]}
+    """
+    image_path, success = extract_embedded_images(pdf_path, fig["page"], output_dir, fig)
+    
+    if success and image_path:
+        return {
+            "page": fig["page"],
+            "type": fig["type"],
+            "number": fig["number"],
+            "path": image_path,
+            "caption": fig["caption"],
+            "extractable": True
+        }
+    
+    return {
+        "page": fig["page"],
+        "type": fig["type"],
+        "number": fig["number"],
+        "path": None,
+        "caption": fig["caption"],
+        "extractable": False,
+        "message": f"该{fig['type']}为矢量格式或无法单独提取，请参阅原PDF第{fig['page']}页"
+    }
+
+
+def default_figures_dir(pdf_path):
+    """默认图片输出目录：PDF 同目录同名文件夹下的 figures/"""
+    pdf_dir = os.path.dirname(os.path.abspath(pdf_path))
+    pdf_name = Path(pdf_path).stem
+    return os.path.join(pdf_dir, pdf_name, "figures")
+
+
 def extract_figures(pdf_path, purpose="deep_dive", output_dir=None, max_override=None):
     """
     智能提取 PDF 图表
@@ -201,75 +400,96 @@ def extract_figures(pdf_path, purpose="deep_dive", output_dir=None, max_override
     """
     try:
         doc = fitz.open(pdf_path)
-        total_pages = len(doc)
+        page_texts, unique_figures = collect_figures(doc)
+        doc.close()
+        citation_index = build_citation_index(page_texts, unique_figures)
         
-        # 设置输出目录
         if output_dir is None:
-            pdf_dir = os.path.dirname(os.path.abspath(pdf_path))
-            pdf_name = Path(pdf_path).stem
-            output_dir = os.path.join(pdf_dir, pdf_name, "figures")
+            output_dir = default_figures_dir(pdf_path)
         
         strategy = PURPOSE_STRATEGIES.get(purpose, PURPOSE_STRATEGIES["deep_dive"])
         max_figures = max_override or strategy["max_figures"]
+        selected_figures = rank_figures(unique_figures, citation_index, purpose, max_figures)
         
-        # 收集所有图表信息
-        all_figures = []
-        page_texts = {}
+        # 提取图像
+        result = []
+        unextractable_count = 0
         
-        for i in range(total_pages):
-            page = doc[i]
-            page_text = page.get_text()
-            page_texts[i + 1] = page_text
-            
-            figures_in_page = detect_figures_in_page(page_text, i + 1)
-            for fig in figures_in_page:
-                fig["importance"] = calculate_figure_importance(fig, page_text, purpose)
-                all_figures.append(fig)
+        for fig in selected_figures:
+            entry = materialize_figure(pdf_path, fig, output_dir)
+            entry["importance"] = fig["importance"]
+            if not entry["extractable"]:
+                unextractable_count += 1
+            result.append(entry)
+        
+        if unextractable_count > 0:
+            print(f"[paper-lens] {unextractable_count} 个图表无法单独提取，已跳过", file=sys.stderr)
         
+        return result
+        
+    except Exception as e:
+        print(f"Error extracting figures: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return []
+
+
+def extract_figures_all_purposes(pdf_path, output_dir=None, purposes=None, page_texts=None):
+    """
+    单次解析文档，同时计算所有阅读目的的图表选择
+    
+    页面文本与图注只解析一次；各目的选中的图表合并去重后只导出一次，
+    切换阅读目的时用 select_purpose_figures() 查表即可。
+    
+    Args:
+        pdf_path: PDF 文件路径
+        output_dir: 图片输出目录
+        purposes: 需要计算的阅读目的列表（默认全部）
+        page_texts: 调用方已提取的 {页码: 文本}，这些页面不再重复 get_text()
+    
+    Returns:
+        dict: {
+            figures: [{page, type, number, path, caption, extractable}],  # 去重后的全集
+            purposes: {purpose: [{type, number, importance}]}             # 按重要性排序
+        }
+    """
+    result = {"figures": [], "purposes": {}}
+    
+    try:
+        doc = fitz.open(pdf_path)
+        page_texts, unique_figures = collect_figures(doc, page_texts)
         doc.close()
+        citation_index = build_citation_index(page_texts, unique_figures)
         
-        # 去重
-        seen = set()
-        unique_figures = []
-        for fig in all_figures:
-            key = (fig["type"], fig["number"])
-            if key not in seen:
-                seen.add(key)
-                unique_figures.append(fig)
+        if output_dir is None:
+            output_dir = default_figures_dir(pdf_path)
         
-        # 按重要性排序并选取 top N
-        unique_figures.sort(key=lambda x: x["importance"], reverse=True)
-        selected_figures = unique_figures[:max_figures]
+        if purposes is None:
+            purposes = list(PURPOSE_STRATEGIES.keys())
         
-        # 提取图像
-        result = []
-        unextractable_count = 0
+        # 每个目的只做评分与排序，不触碰图像
+        needed = []
+        needed_keys = set()
+        for purpose in purposes:
+            strategy = PURPOSE_STRATEGIES.get(purpose, PURPOSE_STRATEGIES["deep_dive"])
+            selected = rank_figures(unique_figures, citation_index, purpose, strategy["max_figures"])
+            result["purposes"][purpose] = [
+                {"type": fig["type"], "number": fig["number"], "importance": fig["importance"]}
+                for fig in selected
+            ]
+            for fig in selected:
+                key = (fig["type"], fig["number"])
+                if key not in needed_keys:
+                    needed_keys.add(key)
+                    needed.append(fig)
         
-        for fig in selected_figures:
-            image_path, success = extract_embedded_images(pdf_path, fig["page"], output_dir, fig)
-            
-            if success and image_path:
-                result.append({
-                    "page": fig["page"],
-                    "type": fig["type"],
-                    "number": fig["number"],
-                    "path": image_path,
-                    "caption": fig["caption"],
-                    "importance": fig["importance"],
-                    "extractable": True
-                })
-            else:
+        # 所有目的共享一份去重后的图像
+        unextractable_count = 0
+        for fig in needed:
+            entry = materialize_figure(pdf_path, fig, output_dir)
+            if not entry["extractable"]:
                 unextractable_count += 1
-                result.append({
-                    "page": fig["page"],
-                    "type": fig["type"],
-                    "number": fig["number"],
-                    "path": None,
-                    "caption": fig["caption"],
-                    "importance": fig["importance"],
-                    "extractable": False,
-                    "message": f"该{fig['type']}为矢量格式或无法单独提取，请参阅原PDF第{fig['page']}页"
-                })
+            result["figures"].append(entry)
         
         if unextractable_count > 0:
             print(f"[paper-lens] {unextractable_count} 个图表无法单独提取，已跳过", file=sys.stderr)
@@ -280,19 +500,231 @@ def extract_figures(pdf_path, purpose="deep_dive", output_dir=None, max_override
         print(f"Error extracting figures: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc()
+        return result
+
+
+def select_purpose_figures(all_purposes_result, purpose):
+    """
+    从 extract_figures_all_purposes() 的结果中取出某个目的的图表
+    返回格式与 extract_figures() 相同
+    """
+    by_key = {(fig["type"], fig["number"]): fig for fig in all_purposes_result.get("figures", [])}
+    selection = all_purposes_result.get("purposes", {}).get(purpose, [])
+    
+    result = []
+    for item in selection:
+        fig = by_key.get((item["type"], item["number"]))
+        if fig is None:
+            continue
+        entry = dict(fig)
+        entry["importance"] = item["importance"]
+        result.append(entry)
+    return result
+
+
+def estimate_image_size(doc, xref, width, height):
+    """
+    不解码图像，粗略估算其字节数：优先读取流的 /Length，否则按 RGB 未压缩估算
+    只用于在同页多张图像中挑选候选，不能据此判断是否可导出
+    （未压缩流的 /Length 是原始像素字节数，解码导出后可能远小于此值）
+    """
+    try:
+        value_type, value = doc.xref_get_key(xref, "Length")
+        if value_type == "int":
+            return int(value)
+    except Exception:
+        pass
+    return width * height * 3
+
+
+def locate_figure_image(doc, page_num, max_pixels=None, max_images=None):
+    """
+    只读取图像元数据，定位页面中最大的嵌入图像（不解码像素）
+    返回: {xref, bbox, width, height, estimated_size}；页面没有可用候选时返回 None
+    """
+    if max_pixels is None:
+        max_pixels = MAX_IMAGE_PIXELS
+    if max_images is None:
+        max_images = MAX_IMAGES_PER_PAGE
+    
+    page = doc[page_num - 1]
+    best = None
+    
+    for img_info in page.get_images(full=True)[:max_images]:
+        xref, width, height = img_info[0], img_info[2], img_info[3]
+        if width * height > max_pixels:
+            continue
+        size = estimate_image_size(doc, xref, width, height)
+        if best is None or size > best["estimated_size"]:
+            best = {"xref": xref, "width": width, "height": height, "estimated_size": size}
+    
+    if best is None:
+        return None
+    
+    try:
+        rects = page.get_image_rects(best["xref"])
+    except Exception:
+        rects = []
+    best["bbox"] = [round(v, 2) for v in rects[0]] if rects else None
+    return best
+
+
+def describe_figures(pdf_path, purpose="deep_dive", max_override=None):
+    """
+    只生成图表描述符，不解码、不写入任何图像
+    
+    Args:
+        pdf_path: PDF 文件路径
+        purpose: 阅读目的
+        max_override: 覆盖默认的最大图表数
+    
+    Returns:
+        list: [{page, type, number, caption, importance, xref, bbox, width, height,
+                estimated_size, extractable}]
+        extractable: False 表示页面没有候选图像；None 表示有候选，
+        是否可导出要等 materialize_descriptors() 解码后按 MIN_IMAGE_BYTES 判定
+    """
+    try:
+        doc = fitz.open(pdf_path)
+        page_texts, unique_figures = collect_figures(doc)
+        citation_index = build_citation_index(page_texts, unique_figures)
+        
+        strategy = PURPOSE_STRATEGIES.get(purpose, PURPOSE_STRATEGIES["deep_dive"])
+        max_figures = max_override or strategy["max_figures"]
+        selected_figures = rank_figures(unique_figures, citation_index, purpose, max_figures)
+        
+        result = []
+        for fig in selected_figures:
+            descriptor = {
+                "page": fig["page"],
+                "type": fig["type"],
+                "number": fig["number"],
+                "caption": fig["caption"],
+                "importance": fig["importance"],
+                "xref": None,
+                "bbox": None,
+                "width": None,
+                "height": None,
+                "estimated_size": 0,
+                "extractable": False
+            }
+            image = locate_figure_image(doc, fig["page"])
+            if image:
+                descriptor.update(image)
+                descriptor["extractable"] = None
+            else:
+                descriptor["message"] = f"该{fig['type']}为矢量格式或无法单独提取，请参阅原PDF第{fig['page']}页"
+            result.append(descriptor)
+        
+        doc.close()
+        return result
+        
+    except Exception as e:
+        print(f"Error describing figures: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
         return []
 
 
+def materialize_descriptor(doc, descriptor, output_dir):
+    """
+    按描述符导出单个图像（调用方负责打开/关闭 doc）
+    与 extract_figures() 相同，解码后不足 MIN_IMAGE_BYTES 的图像视为不可导出
+    返回: 带 path 与最终 extractable 的描述符副本；无法导出时 path 为 None
+    """
+    entry = dict(descriptor)
+    entry["path"] = None
+    
+    if descriptor.get("extractable") is False or not descriptor.get("xref"):
+        entry["extractable"] = False
+        return entry
+    
+    try:
+        base_image = doc.extract_image(descriptor["xref"])
+    except Exception as e:
+        if RAISE_ON_ALLOCATION_FAILURE and is_allocation_failure(e):
+            raise
+        print(f"Error extracting image xref {descriptor['xref']}: {e}", file=sys.stderr)
+        base_image = None
+    
+    if not base_image or len(base_image["image"]) <= MIN_IMAGE_BYTES:
+        entry["extractable"] = False
+        entry["message"] = f"该{descriptor['type']}无法单独提取，请参阅原PDF第{descriptor['page']}页"
+        return entry
+    
+    os.makedirs(output_dir, exist_ok=True)
+    ext = base_image.get("ext", "png")
+    filename = f"{descriptor['type']}_{descriptor['number']}.{ext}"
+    image_path = os.path.join(output_dir, filename)
+    
+    with open(image_path, "wb") as f:
+        f.write(base_image["image"])
+    
+    entry["path"] = image_path
+    entry["extractable"] = True
+    return entry
+
+
+def materialize_descriptors(pdf_path, descriptors, output_dir=None):
+    """
+    批量导出描述符对应的图像，整个批次只打开一次文档
+    返回: 与 descriptors 一一对应、带 path 的列表
+    """
+    if output_dir is None:
+        output_dir = default_figures_dir(pdf_path)
+    
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        print(f"Error opening {pdf_path}: {e}", file=sys.stderr)
+        return [dict(d, path=None) for d in descriptors]
+    
+    result = [materialize_descriptor(doc, d, output_dir) for d in descriptors]
+    doc.close()
+    return result
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python extract_figures.py <pdf_path> [purpose] [output_dir] [max_figures]")
-        print("  purpose: quick_scan|deep_dive|method_focus|review_prep|brainstorm|beginner")
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    
+    if not args:
+        print("Usage: python extract_figures.py <pdf_path> [purpose] [output_dir] [max_figures] [--describe]")
+        print("       python extract_figures.py <pdf_path> --materialize <descriptors.json> [output_dir]")
+        print("  purpose: quick_scan|deep_dive|method_focus|review_prep|brainstorm|beginner|all")
+        print("  all: 单次解析，同时计算全部阅读目的的图表选择")
+        print("  --describe: 只输出图表描述符，不导出图像")
+        print("  --materialize: 按描述符 JSON 导出图像")
         sys.exit(1)
     
-    pdf_path = sys.argv[1]
-    purpose = sys.argv[2] if len(sys.argv) > 2 else "deep_dive"
-    output_dir = sys.argv[3] if len(sys.argv) > 3 else None
-    max_figs = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    pdf_path = args[0]
+    
+    if "--materialize" in sys.argv:
+        if len(args) < 2:
+            print("Usage: python extract_figures.py <pdf_path> --materialize <descriptors.json> [output_dir]")
+            sys.exit(1)
+        descriptors_path = args[1]
+        output_dir = args[2] if len(args) > 2 else None
+        with open(descriptors_path, "r", encoding="utf-8") as f:
+            descriptors = json.load(f)
+        figures = materialize_descriptors(pdf_path, descriptors, output_dir)
+        print(json.dumps(figures, ensure_ascii=False, indent=2))
+        sys.exit(0)
+    
+    purpose = args[1] if len(args) > 1 else "deep_dive"
+    output_dir = args[2] if len(args) > 2 else None
+    max_figs = int(args[3]) if len(args) > 3 else None
+    
+    if purpose == "all" and "--describe" in sys.argv:
+        print("Error: --describe 需要指定单个阅读目的，不支持 all", file=sys.stderr)
+        sys.exit(1)
+    if purpose == "all" and max_figs is not None:
+        print("Error: all 模式按各阅读目的的默认数量选图，不支持 max_figures", file=sys.stderr)
+        sys.exit(1)
     
-    figures = extract_figures(pdf_path, purpose, output_dir, max_figs)
+    if "--describe" in sys.argv:
+        figures = describe_figures(pdf_path, purpose, max_figs)
+    elif purpose == "all":
+        figures = extract_figures_all_purposes(pdf_path, output_dir)
+    else:
+        figures = extract_figures(pdf_path, purpose, output_dir, max_figs)
     print(json.dumps(figures, ensure_ascii=False, indent=2))
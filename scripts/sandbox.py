@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+沙箱提取模块
+- 每篇文档在独立子进程中提取，超时或超内存时终止并回收子进程
+- 支持文档级/阶段级时间限制、图像解码像素上限、内存上限
+- 异常中止时返回已完成部分的结果与明确的 status，而不是卡死整个流程
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import multiprocessing as mp
+
+import fitz  # PyMuPDF
+
+import extract_figures as figures_module
+from extract_content import resolve_output_dir, extract_metadata, get_pages_for_purpose
+from extract_figures import (
+    PURPOSE_STRATEGIES, collect_figures, build_citation_index, rank_figures, materialize_figure,
+    is_allocation_failure
+)
+
+# 默认资源限制
+DEFAULT_LIMITS = {
+    "doc_timeout": 300,          # 单篇文档总时长（秒）
+    "stage_timeout": 120,        # 单个阶段时长（秒）
+    "max_pixels": figures_module.MAX_IMAGE_PIXELS,
+    "max_images_per_page": figures_module.MAX_IMAGES_PER_PAGE,
+    "memory_mb": 2048,           # 子进程地址空间上限（仅 POSIX 生效）
+}
+
+# 结果状态
+STATUS_OK = "ok"
+STATUS_DOC_TIMEOUT = "doc_timeout"
+STATUS_STAGE_TIMEOUT = "stage_timeout"
+STATUS_MEMORY = "memory_exceeded"
+STATUS_CRASHED = "crashed"
+STATUS_ERROR = "error"
+
+# 子进程退出码：错误消息可能因内存耗尽发送失败，父进程据此兜底判断
+EXIT_MEMORY = 3
+EXIT_ERROR = 4
+
+
+def apply_memory_limit(memory_mb):
+    """限制当前进程的地址空间，Windows 等不支持 resource 的平台直接跳过"""
+    if not memory_mb:
+        return False
+    try:
+        import resource
+    except ImportError:
+        return False
+
+    limit = int(memory_mb) * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        return True
+    except (ValueError, OSError):
+        return False
+
+
+def _worker(pdf_path, purpose, output_dir, limits, channel):
+    """
+    子进程入口：逐阶段提取，每完成一部分就发回父进程
+    消息格式: (kind, payload)，kind ∈ stage/metadata/text/figure/done/error
+    """
+    # 先发送第一条消息，在限制内存之前启动队列的后台发送线程
+    channel.put(("stage", "metadata"))
+    apply_memory_limit(limits["memory_mb"])
+    figures_module.MAX_IMAGE_PIXELS = limits["max_pixels"]
+    figures_module.MAX_IMAGES_PER_PAGE = limits["max_images_per_page"]
+    figures_module.RAISE_ON_ALLOCATION_FAILURE = True
+
+    try:
+        channel.put(("metadata", extract_metadata(pdf_path)))
+
+        channel.put(("stage", "text"))
+        doc = fitz.open(pdf_path)
+        page_texts = {}
+        for page_num in get_pages_for_purpose(purpose, len(doc)):
+            page_texts[page_num] = doc[page_num - 1].get_text()
+            channel.put(("text", {"page": page_num, "text": page_texts[page_num]}))
+
+        channel.put(("stage", "figures"))
+        page_texts, unique_figures = collect_figures(doc, page_texts)
+        doc.close()
+
+        strategy = PURPOSE_STRATEGIES.get(purpose, PURPOSE_STRATEGIES["deep_dive"])
+        selected = rank_figures(unique_figures, build_citation_index(page_texts, unique_figures), purpose, strategy["max_figures"])
+        figures_dir = os.path.join(output_dir, "figures")
+        for fig in selected:
+            entry = materialize_figure(pdf_path, fig, figures_dir)
+            entry["importance"] = fig["importance"]
+            channel.put(("figure", entry))
+
+        channel.put(("done", None))
+    except Exception as e:
+        if is_allocation_failure(e):
+            status, exit_code = STATUS_MEMORY, EXIT_MEMORY
+            message = f"memory limit exceeded ({type(e).__name__}: {e})"
+        else:
+            status, exit_code = STATUS_ERROR, EXIT_ERROR
+            message = f"{type(e).__name__}: {e}"
+        try:
+            channel.put(("error", (status, message)))
+        finally:
+            sys.exit(exit_code)
+
+
+def _describe_exit(exitcode, stage):
+    """把未发送 done/error 就退出的子进程翻译为状态与说明"""
+    where = f" during stage '{stage}'" if stage else ""
+    if exitcode == EXIT_MEMORY:
+        return STATUS_MEMORY, f"memory limit exceeded{where}"
+    if exitcode is not None and exitcode < 0:
+        return STATUS_CRASHED, f"worker killed by signal {-exitcode}{where}"
+    return STATUS_CRASHED, f"worker exited with code {exitcode}{where} without reporting a result"
+
+
+def _stop_worker(proc):
+    """终止子进程：先 terminate，不退出再 kill"""
+    if proc.is_alive():
+        proc.terminate()
+        proc.join(2)
+    if proc.is_alive():
+        proc.kill()
+    proc.join()
+
+
+def run_supervised(pdf_path, purpose="deep_dive", output_dir=None, limits=None):
+    """
+    在受监管的子进程中提取单篇文档
+
+    Args:
+        pdf_path: PDF 文件路径
+        purpose: 阅读目的
+        output_dir: 输出目录 (默认 PDF 同目录同名文件夹)
+        limits: 覆盖 DEFAULT_LIMITS 中的部分限制
+
+    Returns:
+        dict: {status, stage, error, text, figures, metadata, output_dir, elapsed}
+        status 非 ok 时，text/figures 只包含中止前已完成的部分
+    """
+    limits = dict(DEFAULT_LIMITS, **(limits or {}))
+    if output_dir is None:
+        output_dir = resolve_output_dir(pdf_path)
+
+    result = {
+        "status": STATUS_OK,
+        "stage": None,
+        "error": None,
+        "text": [],
+        "figures": [],
+        "metadata": {},
+        "output_dir": output_dir,
+        "elapsed": {}
+    }
+
+    ctx = mp.get_context()
+    channel = ctx.Queue()
+    proc = ctx.Process(target=_worker, args=(pdf_path, purpose, output_dir, limits, channel), daemon=True)
+
+    doc_start = time.monotonic()
+    stage_start = doc_start
+    proc.start()
+
+    while True:
+        now = time.monotonic()
+        if now - doc_start > limits["doc_timeout"]:
+            result["status"] = STATUS_DOC_TIMEOUT
+            result["error"] = f"document exceeded {limits['doc_timeout']}s"
+            break
+        if result["stage"] and now - stage_start > limits["stage_timeout"]:
+            result["status"] = STATUS_STAGE_TIMEOUT
+            result["error"] = f"stage '{result['stage']}' exceeded {limits['stage_timeout']}s"
+            break
+
+        try:
+            kind, payload = channel.get(timeout=0.2)
+        except queue.Empty:
+            if not proc.is_alive():
+                result["status"], result["error"] = _describe_exit(proc.exitcode, result["stage"])
+                break
+            continue
+
+        if kind == "stage":
+            if result["stage"]:
+                result["elapsed"][result["stage"]] = round(now - stage_start, 3)
+            result["stage"] = payload
+            stage_start = now
+        elif kind == "metadata":
+            result["metadata"] = payload
+        elif kind == "text":
+            result["text"].append(payload)
+        elif kind == "figure":
+            result["figures"].append(payload)
+        elif kind == "error":
+            result["status"], result["error"] = payload
+            break
+        elif kind == "done":
+            break
+
+    if result["stage"] and result["stage"] not in result["elapsed"]:
+        result["elapsed"][result["stage"]] = round(time.monotonic() - stage_start, 3)
+    if result["status"] == STATUS_OK:
+        result["stage"] = None
+
+    _stop_worker(proc)
+    channel.close()
+
+    if result["status"] != STATUS_OK:
+        print(f"[paper-lens] {os.path.basename(pdf_path)}: {result['status']} ({result['error']})，返回部分结果", file=sys.stderr)
+
+    return result
+
+
+def run_batch(pdf_paths, purpose="deep_dive", limits=None):
+    """
+    逐篇在全新子进程中提取，单篇失败不影响后续文档
+    返回: [{pdf_path, ...run_supervised 结果}]
+    """
+    results = []
+    for pdf_path in pdf_paths:
+        result = run_supervised(pdf_path, purpose, limits=limits)
+        result["pdf_path"] = pdf_path
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract content from PDFs in supervised workers")
+    parser.add_argument("pdf_paths", nargs="+", help="Path(s) to PDF file(s)")
+    parser.add_argument("--purpose", "-p", default="deep_dive",
+                        choices=list(PURPOSE_STRATEGIES.keys()),
+                        help="Reading purpose")
+    parser.add_argument("--doc-timeout", type=float, default=DEFAULT_LIMITS["doc_timeout"],
+                        help="Per-document time limit in seconds")
+    parser.add_argument("--stage-timeout", type=float, default=DEFAULT_LIMITS["stage_timeout"],
+                        help="Per-stage time limit in seconds")
+    parser.add_argument("--max-pixels", type=int, default=DEFAULT_LIMITS["max_pixels"],
+                        help="Skip embedded images larger than this many pixels")
+    parser.add_argument("--max-images-per-page", type=int, default=DEFAULT_LIMITS["max_images_per_page"],
+                        help="Inspect at most this many embedded images per page")
+    parser.add_argument("--memory-mb", type=int, default=DEFAULT_LIMITS["memory_mb"],
+                        help="Worker address-space ceiling in MB (0 disables, POSIX only)")
+
+    args = parser.parse_args()
+
+    limits = {
+        "doc_timeout": args.doc_timeout,
+        "stage_timeout": args.stage_timeout,
+        "max_pixels": args.max_pixels,
+        "max_images_per_page": args.max_images_per_page,
+        "memory_mb": args.memory_mb,
+    }
+
+    results = run_batch(args.pdf_paths, args.purpose, limits)
+    print(json.dumps(results, ensure_ascii=True, indent=2))
+
+    if any(r["status"] != STATUS_OK for r in results):
+        sys.exit(2)